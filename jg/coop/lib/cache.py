@@ -1,4 +1,7 @@
 import asyncio
+import copy
+import time
+from collections import OrderedDict
 from datetime import timedelta
 from functools import lru_cache, wraps
 from typing import Any, Callable
@@ -14,6 +17,8 @@ from jg.coop.lib.async_utils import call_async
 
 CACHE_DIR = ".cache"
 
+MEMORY_CACHE_SIZE = 4096
+
 
 logger = loggers.from_path(__file__)
 
@@ -51,18 +56,28 @@ def cache(
         # Rewriting subset of diskcache.memoize() to support async
         if asyncio.iscoroutinefunction(fn):
             base = (full_name(fn),)
+            memory_cache = MemoryCache(MEMORY_CACHE_SIZE)
 
             @wraps(fn)
             async def wrapper(*args, **kwargs) -> Any:
                 key = args_to_key(base, args, kwargs, False, ignore)
-                result = await call_async(cache.get, key, default=ENOVAL, retry=True)
+                result = memory_cache.get(key)
+                if result is not ENOVAL:
+                    return result
 
+                result, expire_time = await call_async(
+                    cache.get, key, default=ENOVAL, expire_time=True, retry=True
+                )
                 if result is ENOVAL:
                     result = await fn(*args, **kwargs)
                     if expire is None or expire > 0:
                         await call_async(
                             cache.set, key, result, expire, tag=tag, retry=True
                         )
+                        expire_time = None if expire is None else time.time() + expire
+                        memory_cache.set(key, result, expire_time)
+                else:
+                    memory_cache.set(key, result, expire_time)
 
                 return result
 
@@ -74,18 +89,61 @@ def cache(
     return decorator
 
 
+class MemoryCache:
+    """
+    In-process LRU cache in front of diskcache, so that repeated hits of the
+    async wrapper don't need to go through the thread pool executor.
+
+    Values are copied on the way in and out, so that callers get a fresh
+    object every time, the same as when diskcache unpickles it.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._data = OrderedDict()
+
+    def get(self, key: tuple) -> Any:
+        try:
+            value, expire_time = self._data[key]
+        except (KeyError, TypeError):  # TypeError if the key isn't hashable
+            return ENOVAL
+        if expire_time is not None and expire_time <= time.time():
+            del self._data[key]
+            return ENOVAL
+        self._data.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: tuple, value: Any, expire_time: float | None) -> None:
+        try:
+            hash(key)
+        except TypeError:
+            return  # diskcache pickles the key, so it still caches such calls
+        self._data[key] = (copy.deepcopy(value), expire_time)
+        self._data.move_to_end(key)
+        if len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+
 class BytecodeCache(BaseBytecodeCache):
     def __init__(self, cache: Cache):
         self.cache = cache
+        self._memory = {}
 
     def load_bytecode(self, bucket: Bucket):
+        key = f"jinja:{bucket.key}"
+        try:
+            bytecode = self._memory[key]
+        except KeyError:
+            bytecode = self._memory[key] = self.cache.get(key)
         try:
-            bucket.bytecode_from_string(self.cache.get(f"jinja:{bucket.key}"))
+            bucket.bytecode_from_string(bytecode)
         except KeyError:
             return
 
     def dump_bytecode(self, bucket: Bucket):
-        self.cache.set(f"jinja:{bucket.key}", bucket.bytecode_to_string(), tag="jinja")
+        key = f"jinja:{bucket.key}"
+        bytecode = self._memory[key] = bucket.bytecode_to_string()
+        self.cache.set(key, bytecode, tag="jinja")
 
 
 @lru_cache()
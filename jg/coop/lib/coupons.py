@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import TypedDict
 
 
@@ -22,6 +23,13 @@ class CouponParts(TypedDict):
 
 
 def parse_coupon(coupon: str) -> CouponParts:
+    # The same few coupons repeat across thousands of orders, so the parsing
+    # is cached and callers get a copy they're free to mutate
+    return dict(_parse_coupon(coupon))
+
+
+@lru_cache(maxsize=4096)
+def _parse_coupon(coupon: str) -> CouponParts:
     if match := COUPON_RE.match(coupon):
         parts = match.groupdict()
         parts["coupon"] = "".join(
@@ -1,10 +1,15 @@
 import re
+from datetime import timedelta
 from functools import lru_cache, wraps
+from io import BytesIO
+from typing import Generator
 
 import requests
 from lxml import etree
+from requests.adapters import HTTPAdapter
 
 from jg.coop.lib import loggers
+from jg.coop.lib.cache import cache
 
 
 logger = loggers.from_path(__file__)
@@ -82,6 +87,12 @@ ADDRESS_TYPES_MAPPING = {
 
 RETRY_ON_503_MAX_SECONDS = 3
 
+WORKERS = 8
+
+
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=WORKERS, pool_maxsize=WORKERS))
+
 
 class GeocodeError(Exception):
     pass
@@ -111,21 +122,24 @@ def fetch_location(location_raw, geocode=None, debug_info=None):
 
 
 def optimize_geocoding(geocode):
+    geocode_cached = lru_cache(geocode)
+
     @wraps(geocode)
     def wrapper(location_raw):
         for location_re, value in OPTIMIZATIONS:
             if location_re.search(location_raw):
                 return value
-        return lru_cache(geocode)(location_raw)
+        return geocode_cached(location_raw)
 
     return wrapper
 
 
 @optimize_geocoding
+@cache(expire=timedelta(days=30), tag="geocode-mapycz")
 def geocode_mapycz(location_raw):
     try:
         logger.debug(f"Geocoding '{location_raw}' using api.mapy.cz/v0/geocode")
-        response = requests.get(
+        response = session.get(
             "https://api.mapy.cz/v0/geocode",
             params={"query": location_raw},
             headers=MAPYCZ_REQUEST_HEADERS,
@@ -133,13 +147,11 @@ def geocode_mapycz(location_raw):
         )
         response.raise_for_status()
 
-        xml = etree.fromstring(response.content)
-        items = xml.xpath("//item")
-        if not items:
+        item = next(iter_items(response.content), None)
+        if item is None:
             logger.debug(f"Geocoding '{location_raw}' resulted in nothing")
             return None
 
-        item = items[0]
         title, lat, lng = item.get("title"), item.get("y"), item.get("x")
     except requests.RequestException as e:
         raise GeocodeError(f"Unable to geocode '{location_raw}'") from e
@@ -148,7 +160,7 @@ def geocode_mapycz(location_raw):
         logger.debug(
             f"Reverse geocoding '{location_raw}' lat: {lat} lng: {lng} using api.mapy.cz/v0/rgeocode"
         )
-        response = requests.get(
+        response = session.get(
             "https://api.mapy.cz/v0/rgeocode",
             params={"lat": lat, "lon": lng},
             headers=MAPYCZ_REQUEST_HEADERS,
@@ -156,19 +168,18 @@ def geocode_mapycz(location_raw):
         )
         response.raise_for_status()
 
-        xml = etree.fromstring(response.content)
-        items = xml.xpath("//item")
-        if not items:
-            raise ValueError("No items in the reverse geocode response")
-
         logger.debug(
             f"Reverse geocoding '{location_raw}' lat: {lat} lng: {lng} resulted in {item.attrib!r}"
         )
-        address = {
-            ADDRESS_TYPES_MAPPING[item.attrib["type"]]: item.attrib["name"]
-            for item in items
-            if item.attrib["type"] in ADDRESS_TYPES_MAPPING
-        }
+        address = {}
+        has_items = False
+        for address_item in iter_items(response.content):
+            has_items = True
+            attrib = address_item.attrib
+            if address_type := ADDRESS_TYPES_MAPPING.get(attrib["type"]):
+                address[address_type] = attrib["name"]
+        if not has_items:
+            raise ValueError("No items in the reverse geocode response")
         return address
     except requests.RequestException as e:
         raise GeocodeError(
@@ -176,6 +187,12 @@ def geocode_mapycz(location_raw):
         ) from e
 
 
+def iter_items(xml_content: bytes) -> Generator[etree._Element, None, None]:
+    for _, item in etree.iterparse(BytesIO(xml_content), tag="item"):
+        yield item
+        item.clear()
+
+
 def get_region(address):
     if address["country"].lower().startswith("česk"):
         region = address["region"]
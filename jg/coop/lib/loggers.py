@@ -4,7 +4,6 @@ from pathlib import Path
 from typing import Any, Generator, Iterable, cast
 
 from jg.coop.lib import global_state
-from jg.coop.lib.chunks import chunks
 
 
 MUTED_LOGGERS = [
@@ -41,11 +40,13 @@ class Logger(logging.Logger):
     def progress(
         self, iterable: Iterable, chunk_size=100
     ) -> Generator[Any, None, None]:
-        total_count = 0
-        for chunk in chunks(iterable, size=chunk_size):
-            yield from chunk
-            total_count += len(chunk)
-            self.info(f"Done {total_count} items")
+        count = 0
+        for count, item in enumerate(iterable, 1):
+            yield item
+            if count % chunk_size == 0:
+                self.info(f"Done {count} items")
+        if count % chunk_size:
+            self.info(f"Done {count} items")
 
 
 def _configure():
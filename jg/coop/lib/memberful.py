@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import re
+import threading
 from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any, Callable, Generator
@@ -136,17 +137,20 @@ class MemberfulCSV:
         self.user_agent = user_agent or BROWSER_USER_AGENT
         self._session = None
         self._auth_token = None
+        self._auth_lock = threading.Lock()
 
     @property
     def session(self) -> requests.Session:
-        if not self._session:
-            self._session, self._auth_token = self._auth()
+        with self._auth_lock:
+            if not self._session:
+                self._session, self._auth_token = self._auth()
         return self._session
 
     @property
     def auth_token(self) -> MemberfulAuthToken:
-        if not self._auth_token:
-            self._session, self._auth_token = self._auth()
+        with self._auth_lock:
+            if not self._auth_token:
+                self._session, self._auth_token = self._auth()
         return self._auth_token
 
     def _auth(self) -> tuple[requests.Session, Any]:
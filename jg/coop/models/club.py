@@ -181,6 +181,56 @@ class ClubUser(BaseModel):
     def top_members_limit(cls):
         return math.ceil(cls.members_count() * TOP_MEMBERS_PERCENT)
 
+    @classmethod
+    def content_sizes(cls, private=False) -> dict[int, int]:
+        messages = cls._list_all_messages(private=private)
+        return cls._sum_by_author(messages, ClubMessage.content_size)
+
+    @classmethod
+    def recent_content_sizes(
+        cls, today=None, days=RECENT_PERIOD_DAYS, private=False
+    ) -> dict[int, int]:
+        messages = cls._list_all_recent_messages(today, days=days, private=private)
+        return cls._sum_by_author(messages, ClubMessage.content_size)
+
+    @classmethod
+    def upvotes_counts(cls, private=False) -> dict[int, int]:
+        messages = cls._list_all_messages(private=private).where(
+            ClubMessage.parent_channel_id.not_in(UPVOTES_EXCLUDE_CHANNELS)
+        )
+        return cls._sum_by_author(messages, ClubMessage.upvotes_count)
+
+    @classmethod
+    def recent_upvotes_counts(cls, today=None, private=False) -> dict[int, int]:
+        messages = cls._list_all_recent_messages(today, private=private).where(
+            ClubMessage.parent_channel_id.not_in(UPVOTES_EXCLUDE_CHANNELS)
+        )
+        return cls._sum_by_author(messages, ClubMessage.upvotes_count)
+
+    @classmethod
+    def _list_all_messages(cls, private=False):
+        messages = ClubMessage.select()
+        if private:
+            return messages
+        return messages.where(ClubMessage.is_private == False)  # noqa: E712
+
+    @classmethod
+    def _list_all_recent_messages(
+        cls, today=None, days=RECENT_PERIOD_DAYS, private=False
+    ):
+        recent_period_start_at = (today or date.today()) - timedelta(days=days)
+        return cls._list_all_messages(private=private).where(
+            ClubMessage.created_at >= recent_period_start_at
+        )
+
+    @staticmethod
+    def _sum_by_author(messages, field) -> dict[int, int]:
+        return dict(
+            messages.select(ClubMessage.author, fn.SUM(field))
+            .group_by(ClubMessage.author)
+            .tuples()
+        )
+
     @classmethod
     def listing(cls):
         return cls.select()
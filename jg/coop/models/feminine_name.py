@@ -1,4 +1,5 @@
 import re
+from typing import Iterable
 
 from peewee import CharField
 
@@ -14,12 +15,18 @@ class FeminineName(BaseModel):
     name = CharField(unique=True)
 
     @classmethod
-    def is_feminine(cls, full_name):
+    def names(cls) -> frozenset[str]:
+        return frozenset(cls.select(cls.name).scalars())
+
+    @classmethod
+    def is_feminine(cls, full_name, names: Iterable[str] | None = None):
         name_parts = NAME_SPLIT_RE.split(full_name.lower())
         for name in name_parts:
             if FEMININE_SURNAME_RE.search(name):
                 return True
-        for name in name_parts:
-            if cls.get_or_none(cls.name == name):
-                return True
-        return False
+        if names is None:
+            for name in name_parts:
+                if cls.get_or_none(cls.name == name):
+                    return True
+            return False
+        return any(name in names for name in name_parts)
@@ -109,7 +109,10 @@ def is_missing_subscriptions_data(month: date) -> bool:
 
 class SubscriptionActivity(BaseModel):
     class Meta:
-        indexes = ((("type", "account_id", "happened_on"), True),)
+        indexes = (
+            (("type", "account_id", "happened_on"), True),
+            (("account_id", "happened_at", "type"), False),
+        )
 
     type = CharField(constraints=[check_enum("type", SubscriptionActivityType)])
     account_id = IntegerField(index=True)
@@ -1,4 +1,5 @@
 import asyncio
+import os
 from io import BytesIO
 from pathlib import Path
 from urllib.parse import urlparse
@@ -7,7 +8,7 @@ from PIL import Image
 
 from jg.coop.cli.sync import main as cli
 from jg.coop.lib import discord_task, loggers
-from jg.coop.lib.chunks import chunks
+from jg.coop.lib.async_utils import call_async
 from jg.coop.lib.discord_club import ClubClient
 from jg.coop.models.base import db
 from jg.coop.models.club import ClubUser
@@ -20,7 +21,7 @@ IMAGES_PATH = Path("jg/coop/images")
 
 AVATARS_PATH = IMAGES_PATH / "avatars-club"
 
-MEMBERS_CHUNK_SIZE = 10
+CONCURRENCY_LIMIT = 8
 
 AVATARS_LIMIT = 40
 
@@ -35,32 +36,49 @@ def main():
 @db.connection_context()
 async def fetch_avatars(client: ClubClient):
     AVATARS_PATH.mkdir(exist_ok=True, parents=True)
-    for path in AVATARS_PATH.glob("*.png"):
-        path.unlink()
-
-    members_chunks = chunks(
-        ClubUser.members_listing(shuffle=True), size=MEMBERS_CHUNK_SIZE
-    )
-    for n, members_chunk in enumerate(members_chunks, start=1):
-        logger.debug(f"Processing chunk #{n} of {len(members_chunk)} members")
-        await asyncio.gather(
-            *[process_member(client, member) for member in members_chunk]
-        )
-
-        avatars_count = ClubUser.avatars_count()
-        logger.debug(
-            f"There are total {avatars_count} avatars after processing the chunk #{n}"
-        )
-        if avatars_count >= AVATARS_LIMIT:
-            logger.debug(f"Done! Got {avatars_count} avatars, need {AVATARS_LIMIT}")
-            break
-
-
-async def process_member(client: ClubClient, member):
+    with os.scandir(AVATARS_PATH) as entries:
+        existing_paths = {
+            Path(entry.path) for entry in entries if entry.name.endswith(".png")
+        }
+    logger.debug(f"Found {len(existing_paths)} previously downloaded avatars")
+
+    logger.info("Fetching Discord members")
+    discord_members = {
+        discord_member.id: discord_member
+        async for discord_member in client.club_guild.fetch_members(limit=None)
+    }
+
+    # Counting in memory, so that members past the limit don't cost a query each
+    avatars_count = ClubUser.avatars_count()
+    semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
+
+    async def process_member_limited(member: ClubUser) -> None:
+        nonlocal avatars_count
+        async with semaphore:
+            if avatars_count >= AVATARS_LIMIT:
+                return
+            if await process_member(discord_members, member):
+                avatars_count += 1
+
+    async with asyncio.TaskGroup() as group:
+        for member in ClubUser.members_listing(shuffle=True):
+            group.create_task(process_member_limited(member))
+    logger.debug(f"Done! Got {avatars_count} avatars")
+
+    used_paths = {
+        IMAGES_PATH / member.avatar_path for member in ClubUser.avatars_listing()
+    }
+    unused_paths = existing_paths - used_paths
+    logger.debug(f"Removing {len(unused_paths)} unused avatars")
+    for path in unused_paths:
+        os.unlink(path)
+
+
+async def process_member(discord_members, member: ClubUser) -> bool:
     logger_m = logger[str(member.id)]
     logger_m.info(f"Checking avatar of #{member.id}")
     try:
-        discord_member = await client.club_guild.fetch_member(member.id)
+        discord_member = discord_members[member.id]
         avatar = discord_member.display_avatar
         if avatar and not is_default_avatar(avatar.url):
             logger_m.info(f"Has avatar, downloading {avatar.url}")
@@ -72,17 +90,30 @@ async def process_member(client: ClubClient, member):
     except Exception:
         logger_m.exception("Unable to get avatar")
     member.save()
+    return bool(member.avatar_path)
 
 
 async def download_avatar(avatar) -> str:
-    buffer = BytesIO()
-    await avatar.save(buffer)
-    image = Image.open(buffer)
-    image = image.resize((AVATAR_SIZE_PX, AVATAR_SIZE_PX))
     image_path = AVATARS_PATH / f"{Path(urlparse(avatar.url).path).stem}.png"
-    image.save(image_path, "PNG")
+    if image_path.exists():
+        logger.debug(f"Avatar {image_path.name} already downloaded, skipping")
+    else:
+        buffer = BytesIO()
+        await avatar.save(buffer)
+        await call_async(resize_avatar, buffer, image_path)
     return f"avatars-club/{image_path.name}"
 
 
+def resize_avatar(buffer: BytesIO, image_path: Path) -> None:
+    image = Image.open(buffer)
+    image.draft("RGB", (AVATAR_SIZE_PX, AVATAR_SIZE_PX))  # speeds up JPEG decoding
+    image = image.resize(
+        (AVATAR_SIZE_PX, AVATAR_SIZE_PX),
+        resample=Image.Resampling.BILINEAR,
+        reducing_gap=2.0,
+    )
+    image.save(image_path, "PNG")
+
+
 def is_default_avatar(url: str) -> bool:
     return "/embed/avatars/" in url
@@ -35,6 +35,8 @@ GREETERS_LIMIT = 5
 
 PURGE_SAFETY_LIMIT = 20
 
+CONCURRENCY_LIMIT = 10
+
 
 logger = loggers.from_path(__file__)
 
@@ -50,33 +52,38 @@ async def sync_intro(client: ClubClient):
 
     logger.info("Processing messages")
     since_at = datetime.utcnow() - PROCESS_HISTORY_SINCE
-    tasks = []
-    for message in ClubMessage.channel_listing_since(ClubChannelID.INTRO, since_at):
-        tasks.append(asyncio.create_task(process_message(discord_channel, message)))
-
-    logger.info("Purging system messages about created threads")
-    with mutating_discord(discord_channel) as proxy:
-        await proxy.purge(
-            check=is_thread_created, limit=PURGE_SAFETY_LIMIT, after=THREADS_STARTING_AT
-        )
+    semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
+    async with asyncio.TaskGroup() as group:
+        for message in ClubMessage.channel_listing_since(ClubChannelID.INTRO, since_at):
+            group.create_task(process_message(semaphore, discord_channel, message))
+
+        logger.info("Purging system messages about created threads")
+        with mutating_discord(discord_channel) as proxy:
+            await proxy.purge(
+                check=is_thread_created,
+                limit=PURGE_SAFETY_LIMIT,
+                after=THREADS_STARTING_AT,
+            )
 
-    logger.info("Waiting until all messages are processed")
-    await asyncio.gather(*tasks)
+        logger.info("Waiting until all messages are processed")
 
 
-async def process_message(discord_channel: TextChannel, message: ClubMessage):
+async def process_message(
+    semaphore: asyncio.Semaphore, discord_channel: TextChannel, message: ClubMessage
+):
     if message.author.id == ClubMemberID.BOT:
         logger.debug(f"Message {message.url} sent by the bot itself, skipping")
         return
-    if message.type == "default" and message.is_intro:
-        logger.info(f"Welcoming member #{message.author.id}")
-        await welcome(discord_channel, message)
-    elif (
-        message.type == "new_member"
-        and message.author.first_seen_on() < message.created_at.date()
-    ):
-        logger.info(f"Welcoming back member #{message.author.id}")
-        await welcome_back(discord_channel, message)
+    async with semaphore:
+        if message.type == "default" and message.is_intro:
+            logger.info(f"Welcoming member #{message.author.id}")
+            await welcome(discord_channel, message)
+        elif (
+            message.type == "new_member"
+            and message.author.first_seen_on() < message.created_at.date()
+        ):
+            logger.info(f"Welcoming back member #{message.author.id}")
+            await welcome_back(discord_channel, message)
 
 
 @mutations.mutates_discord()
@@ -114,12 +121,14 @@ async def welcome(discord_channel: TextChannel, message: ClubMessage):
     await ensure_thread_name(thread, intro.THREAD_NAME_TEMPLATE)
 
     logger.debug(f"Ensuring welcome messages for {message.author.display_name!r}")
-    discord_messages = [
-        discord_message
-        async for discord_message in thread.history(limit=None)
-        if is_welcome_message(discord_message)
-    ]
-    if discord_messages:
+    has_welcome_message = False
+    # the welcome message is sent right after the thread is created, so it's
+    # usually found on the first page of history when reading oldest first
+    async for discord_message in thread.history(limit=None, oldest_first=True):
+        if is_welcome_message(discord_message):
+            has_welcome_message = True
+            break
+    if has_welcome_message:
         logger.debug(
             f"Thread for {message.author.display_name!r} already has some messages from bot, skipping"
         )
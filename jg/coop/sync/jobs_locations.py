@@ -1,6 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from jg.coop.cli.sync import main as cli
 from jg.coop.lib import loggers
-from jg.coop.lib.locations import fetch_locations
+from jg.coop.lib.locations import WORKERS, fetch_locations
 from jg.coop.models.base import db
 from jg.coop.models.job import ListedJob
 
@@ -11,16 +13,27 @@ logger = loggers.from_path(__file__)
 @cli.sync_command(dependencies=["jobs-listing"])
 @db.connection_context()
 def main():
+    jobs = []
     for job in ListedJob.listing():
         if job.locations_raw:
-            logger.debug(f"Normalizing locations for {job!r}: {job.locations_raw!r}")
-            job.locations = fetch_locations(
-                job.locations_raw,
-                debug_info=dict(title=job.title, company_name=job.company_name),
-            )
+            jobs.append(job)
+        else:
+            logger.debug(f"Job {job!r} has no locations set")
+
+    # One pool for all jobs, so that lookups of different jobs overlap
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        results = executor.map(normalize_locations, jobs)
+        for job, locations in zip(jobs, results):
+            job.locations = locations
             logger.info(
                 f"Locations for {job!r} normalized: {job.locations_raw} → {job.locations}"
             )
             job.save()
-        else:
-            logger.debug(f"Job {job!r} has no locations set")
+
+
+def normalize_locations(job: ListedJob) -> list[dict]:
+    logger.debug(f"Normalizing locations for {job!r}: {job.locations_raw!r}")
+    return fetch_locations(
+        job.locations_raw,
+        debug_info=dict(title=job.title, company_name=job.company_name),
+    )
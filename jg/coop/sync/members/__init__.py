@@ -32,6 +32,7 @@ def main():
     memberful = MemberfulAPI()
 
     members = memberful.get_nodes(MEMBERS_GQL_PATH.read_text())
+    feminine_names = FeminineName.names()
     seen_discord_ids = set()
     for member in logger.progress(members):
         account_id = int(member["id"])
@@ -47,7 +48,7 @@ def main():
             seen_discord_ids.add(user.id)
 
             name = member["fullName"].strip()
-            has_feminine_name = FeminineName.is_feminine(name)
+            has_feminine_name = FeminineName.is_feminine(name, feminine_names)
 
             subscribed_at = SubscriptionActivity.account_subscribed_at(account_id)
             if not subscribed_at:
@@ -1,10 +1,12 @@
-from collections import Counter
+import asyncio
+import heapq
+from operator import itemgetter
 from pathlib import Path
 from pprint import pformat
 from typing import Iterable
 
 import emoji
-from discord import Color
+from discord import Color, Member, Role
 from slugify import slugify
 from strictyaml import Int, Map, Seq, Str, load
 
@@ -35,6 +37,8 @@ YAML_SCHEMA = Seq(
 
 SPONSOR_ROLE_PREFIX = "Firma: "
 
+CONCURRENCY_LIMIT = 8
+
 
 logger = loggers.from_path(__file__)
 
@@ -112,143 +116,137 @@ async def sync_roles(client: ClubClient):
         )
 
     logger.info("Preparing data for computing how to re-assign roles")
-    members = ClubUser.members_listing()
-    sponsors = Sponsor.listing()
+    members = list(ClubUser.members_listing())
+    sponsors = list(Sponsor.listing())
+    display_names = {member.id: member.display_name for member in members}
     coupons = Sponsor.coupons()
-    changes = []
+    roles_members_ids = {}
     top_members_limit = ClubUser.top_members_limit()
     logger.info(f"members_count={len(members)}, top_members_limit={top_members_limit}")
 
     logger.info("Computing how to re-assign role: most_discussing")
     role_id = DocumentedRole.get_by_slug("most_discussing").club_id
+    content_sizes = ClubUser.content_sizes()
+    recent_content_sizes = ClubUser.recent_content_sizes()
     content_size_stats = calc_stats(
-        members, lambda m: m.content_size(), top_members_limit
+        members, lambda m: content_sizes.get(m.id, 0), top_members_limit
     )
-    logger.debug(f"content_size {repr_stats(members, content_size_stats)}")
+    logger.debug(f"content_size {repr_stats(display_names, content_size_stats)}")
     recent_content_size_stats = calc_stats(
-        members, lambda m: m.recent_content_size(), top_members_limit
+        members, lambda m: recent_content_sizes.get(m.id, 0), top_members_limit
     )
     logger.debug(
-        f"recent_content_size {repr_stats(members, recent_content_size_stats)}"
+        f"recent_content_size {repr_stats(display_names, recent_content_size_stats)}"
     )
     most_discussing_members_ids = set(content_size_stats.keys()) | set(
         recent_content_size_stats.keys()
     )
     logger.debug(
-        f"most_discussing_members: {repr_ids(members, most_discussing_members_ids)}"
+        f"most_discussing_members: {repr_ids(display_names, most_discussing_members_ids)}"
     )
-    for member in members:
-        changes.extend(
-            evaluate_changes(
-                member.id, member.initial_roles, most_discussing_members_ids, role_id
-            )
-        )
+    roles_members_ids[role_id] = most_discussing_members_ids
 
     logger.info("Computing how to re-assign role: most_helpful")
     role_id = DocumentedRole.get_by_slug("most_helpful").club_id
+    upvotes_counts = ClubUser.upvotes_counts()
+    recent_upvotes_counts = ClubUser.recent_upvotes_counts()
     upvotes_count_stats = calc_stats(
-        members, lambda m: m.upvotes_count(), top_members_limit
+        members, lambda m: upvotes_counts.get(m.id, 0), top_members_limit
     )
-    logger.debug(f"upvotes_count {repr_stats(members, upvotes_count_stats)}")
+    logger.debug(f"upvotes_count {repr_stats(display_names, upvotes_count_stats)}")
     recent_upvotes_count_stats = calc_stats(
-        members, lambda m: m.recent_upvotes_count(), top_members_limit
+        members, lambda m: recent_upvotes_counts.get(m.id, 0), top_members_limit
     )
     logger.debug(
-        f"recent_upvotes_count {repr_stats(members, recent_upvotes_count_stats)}"
+        f"recent_upvotes_count {repr_stats(display_names, recent_upvotes_count_stats)}"
     )
     most_helpful_members_ids = set(upvotes_count_stats.keys()) | set(
         recent_upvotes_count_stats.keys()
     )
-    logger.debug(f"most_helpful_members: {repr_ids(members, most_helpful_members_ids)}")
-    for member in members:
-        changes.extend(
-            evaluate_changes(
-                member.id, member.initial_roles, most_helpful_members_ids, role_id
-            )
-        )
+    logger.debug(
+        f"most_helpful_members: {repr_ids(display_names, most_helpful_members_ids)}"
+    )
+    roles_members_ids[role_id] = most_helpful_members_ids
 
     logger.info("Computing how to re-assign role: has_intro_and_avatar")
     role_id = DocumentedRole.get_by_slug("has_intro_and_avatar").club_id
-    intro_avatar_members_ids = [
+    intro_avatar_members_ids = {
         member.id for member in members if member.has_avatar and member.intro
-    ]
-    logger.debug(f"intro_avatar_members: {repr_ids(members, intro_avatar_members_ids)}")
-    for member in members:
-        changes.extend(
-            evaluate_changes(
-                member.id, member.initial_roles, intro_avatar_members_ids, role_id
-            )
-        )
+    }
+    logger.debug(
+        f"intro_avatar_members: {repr_ids(display_names, intro_avatar_members_ids)}"
+    )
+    roles_members_ids[role_id] = intro_avatar_members_ids
 
     logger.info("Computing how to re-assign role: newcomer")
     role_id = DocumentedRole.get_by_slug("newcomer").club_id
-    new_members_ids = [member.id for member in members if member.is_new()]
-    logger.debug(f"new_members_ids: {repr_ids(members, new_members_ids)}")
-    for member in members:
-        changes.extend(
-            evaluate_changes(member.id, member.initial_roles, new_members_ids, role_id)
-        )
+    new_members_ids = {member.id for member in members if member.is_new()}
+    logger.debug(f"new_members_ids: {repr_ids(display_names, new_members_ids)}")
+    roles_members_ids[role_id] = new_members_ids
 
     logger.info("Computing how to re-assign role: speaker")
     role_id = DocumentedRole.get_by_slug("speaker").club_id
-    speaking_members_ids = [member.id for member in Event.list_speaking_members()]
-    logger.debug(f"speaking_members_ids: {repr_ids(members, speaking_members_ids)}")
-    for member in members:
-        changes.extend(
-            evaluate_changes(
-                member.id, member.initial_roles, speaking_members_ids, role_id
-            )
-        )
+    speaking_members_ids = {member.id for member in Event.list_speaking_members()}
+    logger.debug(
+        f"speaking_members_ids: {repr_ids(display_names, speaking_members_ids)}"
+    )
+    roles_members_ids[role_id] = speaking_members_ids
 
     logger.info("Computing how to re-assign role: founder")
     role_id = DocumentedRole.get_by_slug("founder").club_id
-    founders_members_ids = [member.id for member in members if member.is_founder()]
-    logger.debug(f"founders_members_ids: {repr_ids(members, founders_members_ids)}")
-    for member in members:
-        changes.extend(
-            evaluate_changes(
-                member.id, member.initial_roles, founders_members_ids, role_id
-            )
-        )
+    founders_members_ids = {member.id for member in members if member.is_founder()}
+    logger.debug(
+        f"founders_members_ids: {repr_ids(display_names, founders_members_ids)}"
+    )
+    roles_members_ids[role_id] = founders_members_ids
 
     logger.info("Computing how to re-assign role: sponsor")
     role_id = DocumentedRole.get_by_slug("sponsor").club_id
-    sponsors_members_ids = [member.id for member in members if member.coupon in coupons]
-    logger.debug(f"sponsors_members_ids: {repr_ids(members, sponsors_members_ids)}")
-    for member in members:
-        changes.extend(
-            evaluate_changes(
-                member.id, member.initial_roles, sponsors_members_ids, role_id
-            )
-        )
+    sponsors_members_ids = {member.id for member in members if member.coupon in coupons}
+    logger.debug(
+        f"sponsors_members_ids: {repr_ids(display_names, sponsors_members_ids)}"
+    )
+    roles_members_ids[role_id] = sponsors_members_ids
 
     # syncing with Discord
     logger.info(f"Managing roles for {len(sponsors)} sponsors")
-    await manage_sponsor_roles(client, discord_roles, sponsors)
+    discord_roles = await manage_sponsor_roles(client, discord_roles, sponsors)
 
+    members_ids_by_coupon = {}
+    for member in members:
+        if member.coupon:
+            members_ids_by_coupon.setdefault(member.coupon, set()).add(member.id)
     for sponsor in sponsors:
-        sponsor_members_ids = [member.id for member in sponsor.list_members]
+        sponsor_members_ids = members_ids_by_coupon.get(sponsor.coupon, set())
         logger.debug(
-            f"sponsor_members_ids({sponsor!r}): {repr_ids(members, sponsor_members_ids)}"
+            f"sponsor_members_ids({sponsor!r}): {repr_ids(display_names, sponsor_members_ids)}"
         )
-        for member in members:
+        roles_members_ids[sponsor.role_id] = sponsor_members_ids
+
+    logger.info(f"Computing changes for {len(roles_members_ids)} roles")
+    changes = []
+    for member in members:
+        for role_id, role_members_ids in roles_members_ids.items():
             changes.extend(
                 evaluate_changes(
-                    member.id,
-                    member.initial_roles,
-                    sponsor_members_ids,
-                    sponsor.role_id,
+                    member.id, member.initial_roles, role_members_ids, role_id
                 )
             )
 
+    logger.info("Fetching Discord members")
+    discord_members = {
+        discord_member.id: discord_member
+        async for discord_member in client.club_guild.fetch_members(limit=None)
+    }
+
     logger.info(f"Applying {len(changes)} changes to roles:\n{pformat(changes)}")
-    await apply_changes(client, changes)
+    await apply_changes(discord_roles, discord_members, changes)
 
 
 # TODO rewrite so it doesn't need any async/await and can be tested
 async def manage_sponsor_roles(
-    client: ClubClient, discord_roles, sponsors: Iterable[Sponsor]
-):
+    client: ClubClient, discord_roles: list[Role], sponsors: Iterable[Sponsor]
+) -> list[Role]:
     sponsor_roles_mapping = {
         SPONSOR_ROLE_PREFIX + sponsor.name: sponsor for sponsor in sponsors
     }
@@ -268,6 +266,7 @@ async def manage_sponsor_roles(
         logger.info(f"Removing role '{role.name}'")
         with mutating_discord(role) as proxy:
             await proxy.delete()
+    discord_roles = [role for role in discord_roles if role not in roles_to_remove]
 
     roles_names_to_add = set(roles_names) - {role.name for role in existing_roles}
     logger.info(f"Roles [{', '.join(roles_names_to_add)}] will be added")
@@ -279,60 +278,104 @@ async def manage_sponsor_roles(
             else Color.default()
         )
         with mutating_discord(client.club_guild) as proxy:
-            await proxy.create_role(name=role_name, color=color, mentionable=True)
+            if role := await proxy.create_role(
+                name=role_name, color=color, mentionable=True
+            ):
+                discord_roles.append(role)
 
     existing_roles = [
         role for role in discord_roles if role.name.startswith(SPONSOR_ROLE_PREFIX)
     ]
-    for role in existing_roles:
-        sponsor = sponsor_roles_mapping.get(role.name)
-        if sponsor:
-            logger.info(f"Setting '{role.name}' to be employee role of {sponsor!r}'")
-            sponsor.role_id = role.id
-            sponsor.save()
-
-
-async def apply_changes(client: ClubClient, changes):
-    # Can't take discord_roles as an argument and use instead of fetching, because before
-    # this function runs, manage_sponsor_roles makes changes to the list of roles. This
-    # function applies all changes to members, including the sponsor ones.
+    with db.atomic():
+        for role in existing_roles:
+            sponsor = sponsor_roles_mapping.get(role.name)
+            if sponsor:
+                logger.info(
+                    f"Setting '{role.name}' to be employee role of {sponsor!r}'"
+                )
+                sponsor.role_id = role.id
+                sponsor.save()
+    return discord_roles
+
+
+async def apply_changes(discord_roles: list[Role], discord_members, changes):
     all_discord_roles = {
-        discord_role.id: discord_role
-        for discord_role in await client.club_guild.fetch_roles()
+        discord_role.id: discord_role for discord_role in discord_roles
     }
 
     changes_by_members = {}
     for member_id, op, role_id in changes:
         changes_by_members.setdefault(member_id, dict(add=[], remove=[]))
         changes_by_members[member_id][op].append(role_id)
-
-    for member_id, changes in changes_by_members.items():
-        discord_member = await client.club_guild.fetch_member(member_id)
-        if changes["add"]:
-            discord_roles = [all_discord_roles[role_id] for role_id in changes["add"]]
-            logger.debug(
-                f"{discord_member.display_name}: adding {repr_roles(discord_roles)}"
-            )
-            with mutating_discord(discord_member) as proxy:
-                await proxy.add_roles(*discord_roles)
-        if changes["remove"]:
-            discord_roles = [
-                all_discord_roles[role_id] for role_id in changes["remove"]
-            ]
-            logger.debug(
-                f"{discord_member.display_name}: removing {repr_roles(discord_roles)}"
+    if not changes_by_members:
+        logger.info("No changes to apply")
+        return
+
+    discord_members_changes = []
+    for member_id, member_changes in changes_by_members.items():
+        try:
+            discord_member = discord_members[member_id]
+        except KeyError:
+            logger.warning(f"Member #{member_id} isn't on Discord anymore, skipping")
+        else:
+            discord_members_changes.append((discord_member, member_changes))
+
+    semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
+    async with asyncio.TaskGroup() as group:
+        tasks = [
+            group.create_task(
+                apply_member_changes(
+                    semaphore, all_discord_roles, discord_member, member_changes
+                )
             )
-            with mutating_discord(discord_member) as proxy:
-                await proxy.remove_roles(*discord_roles)
+            for discord_member, member_changes in discord_members_changes
+        ]
+    members = [member for task in tasks if (member := task.result())]
+
+    logger.info(f"Saving updated roles of {len(members)} members")
+    with db.atomic():
+        ClubUser.bulk_update(members, fields=[ClubUser.updated_roles], batch_size=200)
+
+
+async def apply_member_changes(
+    semaphore: asyncio.Semaphore,
+    all_discord_roles,
+    discord_member: Member,
+    changes,
+) -> ClubUser | None:
+    try:
+        async with semaphore:
+            if changes["add"]:
+                discord_roles = [
+                    all_discord_roles[role_id] for role_id in changes["add"]
+                ]
+                logger.debug(
+                    f"{discord_member.display_name}: adding {repr_roles(discord_roles)}"
+                )
+                with mutating_discord(discord_member) as proxy:
+                    await proxy.add_roles(*discord_roles)
+            if changes["remove"]:
+                discord_roles = [
+                    all_discord_roles[role_id] for role_id in changes["remove"]
+                ]
+                logger.debug(
+                    f"{discord_member.display_name}: removing {repr_roles(discord_roles)}"
+                )
+                with mutating_discord(discord_member) as proxy:
+                    await proxy.remove_roles(*discord_roles)
 
-        member = ClubUser.get_by_id(member_id)
+        member = ClubUser.get_by_id(discord_member.id)
         member.updated_roles = get_user_roles(discord_member)
-        member.save()
+        return member
+    except Exception:
+        # Don't let one member cancel changes of the others and prevent saving them
+        logger.exception(f"Unable to apply role changes to #{discord_member.id}")
+        return None
 
 
 def calc_stats(members, calc_member_fn, top_members_limit):
-    counter = Counter({member.id: calc_member_fn(member) for member in members})
-    return dict(counter.most_common()[:top_members_limit])
+    stats = ((member.id, calc_member_fn(member)) for member in members)
+    return dict(heapq.nlargest(top_members_limit, stats, key=itemgetter(1)))
 
 
 def evaluate_changes(member_id, initial_roles_ids, role_members_ids, role_id):
@@ -343,13 +386,11 @@ def evaluate_changes(member_id, initial_roles_ids, role_members_ids, role_id):
     return []
 
 
-def repr_stats(members, stats):
-    display_names = {member.id: member.display_name for member in members}
+def repr_stats(display_names, stats):
     return repr({display_names[member_id]: count for member_id, count in stats.items()})
 
 
-def repr_ids(members, members_ids):
-    display_names = {member.id: member.display_name for member in members}
+def repr_ids(display_names, members_ids):
     return repr(
         sorted(
             [
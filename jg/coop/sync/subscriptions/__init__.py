@@ -1,5 +1,7 @@
 import itertools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time, timezone
+from functools import partial
 from operator import itemgetter
 from pathlib import Path
 from pprint import pformat
@@ -23,6 +25,8 @@ from jg.coop.models.subscription import (
 
 ACTIVITIES_GQL_PATH = Path(__file__).parent / "activities.gql"
 
+ACTIVITIES_GQL = ACTIVITIES_GQL_PATH.read_text()
+
 ACTIVITY_TYPES_MAPPING = {
     "new_order": SubscriptionActivityType.ORDER,
     "renewal": SubscriptionActivityType.ORDER,
@@ -34,6 +38,8 @@ ACTIVITY_TYPES_MAPPING = {
 
 SUBSCRIPTIONS_GQL_PATH = Path(__file__).parent / "subscriptions.gql"
 
+SUBSCRIPTIONS_GQL = SUBSCRIPTIONS_GQL_PATH.read_text()
+
 SUBSCRIPTION_TYPES_MAPPING = {
     "thankyou": SubscriptionType.FREE,
     "thankyouforever": SubscriptionType.FREE,
@@ -46,6 +52,9 @@ SUBSCRIPTION_TYPES_MAPPING = {
     "finaid": SubscriptionType.FINAID,
 }
 
+# Memberful API bans the IP address if hit too hard, keep the parallelism low
+ACTIVITIES_WORKERS = 2
+
 
 logger = loggers.from_path(__file__)
 
@@ -67,25 +76,25 @@ def main(from_date, multiple_products_date, history_path, clear_history):
     SubscriptionActivity.drop_table()
     SubscriptionActivity.create_table()
 
-    subscripton_types_mapping = {
-        **{
-            parse_coupon(coupon)["slug"]: SubscriptionType.SPONSOR
-            for coupon in Sponsor.coupons()
-        },
-        **SUBSCRIPTION_TYPES_MAPPING,
-    }
+    subscripton_types_mapping = dict.fromkeys(
+        (parse_coupon(coupon)["slug"] for coupon in Sponsor.coupons()),
+        SubscriptionType.SPONSOR,
+    )
+    subscripton_types_mapping.update(SUBSCRIPTION_TYPES_MAPPING)
 
     # The result of this function will be stored in history, because we cannot store
     # full names of members. If we change how we classify feminine names, there's no
     # way to go back and reclassify the names in the history (without clearing the history).
+    feminine_names = FeminineName.names()
+
     def has_feminine_name(name) -> bool:
-        return FeminineName.is_feminine(name.strip())
+        return FeminineName.is_feminine(name.strip(), feminine_names)
 
     logger.info("Reading history from a file")
     if clear_history:
         history_path.write_text("")
     else:
-        with history_path.open() as f:
+        with db.atomic(), history_path.open() as f:
             for line in f:
                 SubscriptionActivity.deserialize(line)
     from_date = SubscriptionActivity.history_end_on() or from_date
@@ -95,35 +104,37 @@ def main(from_date, multiple_products_date, history_path, clear_history):
     # since the beginning of time. That's very slow and won't finish, because Memberful API
     # will ban the IP address until the next day. It can be done with cache and different
     # IP addresses (like starting over tethering using LTE of my phone, and re-starting over WiFi).
-    queries = (
-        memberful.get_nodes(
-            ACTIVITIES_GQL_PATH.read_text(),
-            dict(
-                type=type,
-                createdAt=dict(
-                    gte=get_timestamp(from_date),
-                    lt=get_timestamp(multiple_products_date),
-                ),
+    with (
+        db.atomic(),
+        ThreadPoolExecutor(max_workers=ACTIVITIES_WORKERS) as executor,
+    ):
+        results = executor.map(
+            partial(
+                fetch_activities,
+                from_date=from_date,
+                multiple_products_date=multiple_products_date,
             ),
+            ACTIVITY_TYPES_MAPPING,
         )
-        for type in ACTIVITY_TYPES_MAPPING
-    )
-    for activity in logger.progress(itertools.chain.from_iterable(queries)):
-        try:
-            account_id = int(activity["member"]["id"])
-        except (KeyError, TypeError):
-            logger.debug(f"Activity with no account ID, skipping:\n{pformat(activity)}")
-        else:
-            happened_at = datetime.utcfromtimestamp(activity["createdAt"])
-            SubscriptionActivity.add(
-                account_id=account_id,
-                account_has_feminine_name=has_feminine_name(
-                    activity["member"]["fullName"]
-                ),
-                happened_on=happened_at.date(),
-                happened_at=happened_at,
-                type=ACTIVITY_TYPES_MAPPING[activity["type"]],
-            )
+        activities = itertools.chain.from_iterable(results)
+        for activity in logger.progress(activities):
+            try:
+                account_id = int(activity["member"]["id"])
+            except (KeyError, TypeError):
+                logger.debug(
+                    f"Activity with no account ID, skipping:\n{pformat(activity)}"
+                )
+            else:
+                happened_at = datetime.utcfromtimestamp(activity["createdAt"])
+                SubscriptionActivity.add(
+                    account_id=account_id,
+                    account_has_feminine_name=has_feminine_name(
+                        activity["member"]["fullName"]
+                    ),
+                    happened_on=happened_at.date(),
+                    happened_at=happened_at,
+                    type=ACTIVITY_TYPES_MAPPING[activity["type"]],
+                )
     logger.info(f"Finished with {SubscriptionActivity.total_count()} activities")
 
     logger.info("Fetching subscriptions from Memberful API")
@@ -131,19 +142,22 @@ def main(from_date, multiple_products_date, history_path, clear_history):
     # say that in such case there's no reason to save the data to history, but the reason
     # we do it is to have a backup (and a git commits to inspect) in case there is something
     # messing with the data again.
-    subscriptions = memberful.get_nodes(SUBSCRIPTIONS_GQL_PATH.read_text())
-    for subscription in logger.progress(subscriptions):
-        if (
-            subscription["createdAt"] >= get_timestamp(multiple_products_date)
-            and not subscription["plan"]["planGroup"]
-        ):
-            logger.debug(f"Not a club subscription, skipping:\n{pformat(subscription)}")
-            continue
-        for activity in activities_from_subscription(subscription):
-            activity["account_has_feminine_name"] = has_feminine_name(
-                subscription["member"]["fullName"]
-            )
-            SubscriptionActivity.add(**activity)
+    with db.atomic():
+        subscriptions = memberful.get_nodes(SUBSCRIPTIONS_GQL)
+        for subscription in logger.progress(subscriptions):
+            if (
+                subscription["createdAt"] >= get_timestamp(multiple_products_date)
+                and not subscription["plan"]["planGroup"]
+            ):
+                logger.debug(
+                    f"Not a club subscription, skipping:\n{pformat(subscription)}"
+                )
+                continue
+            for subscription_activity in activities_from_subscription(subscription):
+                subscription_activity["account_has_feminine_name"] = has_feminine_name(
+                    subscription["member"]["fullName"]
+                )
+                SubscriptionActivity.add(**subscription_activity)
     logger.info(f"Finished with {SubscriptionActivity.total_count()} activities")
 
     logger.info("Saving history to a file")
@@ -155,19 +169,43 @@ def main(from_date, multiple_products_date, history_path, clear_history):
     # History only stores coupon slug, so this is done as part of post-processing.
     # It's better than to store the subscription type in the history, because
     # this way over time we can change how the subscription types are classified.
-    for activity in SubscriptionActivity.select():
-        try:
-            activity.subscription_type = subscripton_types_mapping[
-                activity.order_coupon_slug
+    with db.atomic():
+        SubscriptionActivity.update(
+            subscription_type=SubscriptionType.INDIVIDUAL
+        ).execute()
+        for subscription_type in set(subscripton_types_mapping.values()):
+            coupon_slugs = [
+                coupon_slug
+                for coupon_slug, type_ in subscripton_types_mapping.items()
+                if type_ == subscription_type
             ]
-        except KeyError:
-            activity.subscription_type = SubscriptionType.INDIVIDUAL
-        activity.save()
+            SubscriptionActivity.update(subscription_type=subscription_type).where(
+                SubscriptionActivity.order_coupon_slug.in_(coupon_slugs)
+            ).execute()
 
     logger.info("Cleansing data")
     SubscriptionActivity.cleanse_data()
 
 
+def fetch_activities(
+    type: str, from_date: date, multiple_products_date: date
+) -> list[dict]:
+    # Each thread needs its own client, the underlying transport isn't thread-safe
+    memberful = MemberfulAPI()
+    return list(
+        memberful.get_nodes(
+            ACTIVITIES_GQL,
+            dict(
+                type=type,
+                createdAt=dict(
+                    gte=get_timestamp(from_date),
+                    lt=get_timestamp(multiple_products_date),
+                ),
+            ),
+        )
+    )
+
+
 def activities_from_subscription(subscription: dict) -> Generator[dict, None, None]:
     account_id = int(subscription["member"]["id"])
     subscription_interval = subscription["plan"]["intervalUnit"]
@@ -223,6 +261,8 @@ def activities_from_subscription(subscription: dict) -> Generator[dict, None, No
             order_coupon_slug=subscription_coupon_slug,
         )
 
+    # Newest first, because SubscriptionActivity.add() lets the last one win
+    # if there are more orders on the same day
     orders = sorted(subscription["orders"], key=itemgetter("createdAt"), reverse=True)
     for i, order in enumerate(orders):
         if subscription_coupon_slug and i == 0:
@@ -236,7 +276,7 @@ def activities_from_subscription(subscription: dict) -> Generator[dict, None, No
             type=SubscriptionActivityType.ORDER,
             happened_on=order_created_at.date(),
             happened_at=order_created_at,
-            subscription_interval=subscription["plan"]["intervalUnit"],
+            subscription_interval=subscription_interval,
             order_coupon_slug=order_coupon_slug,
         )
 
@@ -1,11 +1,15 @@
 import itertools
 import math
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from operator import itemgetter
 from pathlib import Path
+from typing import Iterable
 from urllib.parse import urlparse
 
 import click
+from peewee import chunked
 from slugify import slugify
 
 from jg.coop.cli.sync import main as cli
@@ -23,6 +27,32 @@ from jg.coop.models.subscription import (
 )
 
 
+CANCELLATIONS_CSV_URL_PARAMS = [
+    {"filter": "all", "type": "CancellationsCsvExport"},
+    {"filter": "all", "type": "CancellationsCsvExport", "scope": "completed"},
+]
+
+INSERT_BATCH_SIZE = 500
+
+MEMBERS_CSV_FORM_PARAMS = {
+    "csv_export[filter]": "active",
+    "csv_export[preset]": "all_time",
+    "commit": "Export",
+}
+
+get_cancellations_csv_columns = itemgetter(
+    "Email", "Name", "Plan", "Reason", "Feedback"
+)
+
+get_members_csv_columns = itemgetter(
+    "Memberful ID",
+    "Full Name",
+    "Email",
+    "Created at",
+    "Referrer",
+    "Jak ses dozvěděl(a) o junior.guru?",
+)
+
 MEMBERS_GQL_PATH = Path(__file__).parent / "members.gql"
 
 
@@ -37,6 +67,7 @@ logger = loggers.from_path(__file__)
 def main(error_channel_id: int):
     logger.info("Preparing")
     memberful = MemberfulAPI()
+    memberful_csv = MemberfulCSV()
 
     tables = [
         SubscriptionReferrer,
@@ -48,10 +79,30 @@ def main(error_channel_id: int):
     db.create_tables(tables)
 
     try:
-        logger.info("Fetching all members from Memberful API")
-        members = list(
-            logger.progress(memberful.get_nodes(MEMBERS_GQL_PATH.read_text()))
-        )
+        # Memberful generates the CSV exports on its side and we poll for them,
+        # so let's have them all generated while we talk to the API
+        logger.info("Fetching members from Memberful API and CSV exports")
+        with ThreadPoolExecutor(
+            max_workers=2 + len(CANCELLATIONS_CSV_URL_PARAMS)
+        ) as executor:
+            members_future = executor.submit(fetch_members, memberful)
+            members_csv_future = executor.submit(
+                memberful_csv.download_csv,
+                "/admin/members/exports",
+                form_params=MEMBERS_CSV_FORM_PARAMS,
+            )
+            cancellations_csv_futures = [
+                executor.submit(
+                    memberful_csv.download_csv, "/admin/csv_exports", url_params
+                )
+                for url_params in CANCELLATIONS_CSV_URL_PARAMS
+            ]
+            members = members_future.result()
+            members_csv = members_csv_future.result()
+            cancellations_csvs = [
+                future.result() for future in cancellations_csv_futures
+            ]
+
         logger.info(f"Got {len(members)} members")
         emails = {member["email"]: int(member["id"]) for member in members}
         total_spend = {
@@ -59,122 +110,134 @@ def main(error_channel_id: int):
             for member in members
         }
 
-        logger.info("Fetching members data from Memberful CSV")
-        memberful = MemberfulCSV()
-        seen_account_ids = set()
-        for csv_row in memberful.download_csv(
-            path="/admin/members/exports",
-            form_params={
-                "csv_export[filter]": "active",
-                "csv_export[preset]": "all_time",
-                "commit": "Export",
-            },
-        ):
-            account_id = int(csv_row["Memberful ID"])
-            if account_id in seen_account_ids:
-                # This CSV sometimes contains multiple rows for the same account if the account
-                # has different plans etc. We do not really care about those fields, so we treat
-                # the rows as duplicates to simplify further code.
-                continue
-            seen_account_ids.add(account_id)
-
-            referrer = csv_row["Referrer"] or None
-            if referrer:
-                account_details = dict(
-                    account_id=account_id,
-                    account_name=csv_row["Full Name"],
-                    account_email=csv_row["Email"],
-                    account_total_spend=total_spend[account_id],
-                )
-                created_on = date.fromisoformat(csv_row["Created at"])
-                referrer_type = classify_referrer(referrer)
-                if referrer_type.startswith("/"):
-                    SubscriptionInternalReferrer.create(
+        logger.info("Processing members data from Memberful CSV")
+        store_members_csv(members_csv, total_spend)
+
+        logger.info("Processing cancellations data from Memberful CSV")
+        store_cancellations_csv(
+            itertools.chain.from_iterable(cancellations_csvs), emails, total_spend
+        )
+    except Exception as e:
+        logger.exception("Failed to fetch data from Memberful")
+        discord_task.run(report_exception, error_channel_id, e)
+
+
+def fetch_members(memberful: MemberfulAPI) -> list[dict]:
+    return list(logger.progress(memberful.get_nodes(MEMBERS_GQL_PATH.read_text())))
+
+
+def store_members_csv(csv_rows: Iterable[dict], total_spend: dict[int, int]) -> None:
+    seen_account_ids = set()
+    referrers, internal_referrers, marketing_surveys = [], [], []
+    for csv_row in csv_rows:
+        (
+            account_id,
+            account_name,
+            account_email,
+            created_at,
+            referrer,
+            marketing_survey_answer,
+        ) = get_members_csv_columns(csv_row)
+        account_id = int(account_id)
+        if account_id in seen_account_ids:
+            # This CSV sometimes contains multiple rows for the same account if the account
+            # has different plans etc. We do not really care about those fields, so we treat
+            # the rows as duplicates to simplify further code.
+            continue
+        seen_account_ids.add(account_id)
+        if not referrer and not marketing_survey_answer:
+            continue
+
+        account_details = dict(
+            account_id=account_id,
+            account_name=account_name,
+            account_email=account_email,
+            account_total_spend=total_spend[account_id],
+        )
+        created_on = date.fromisoformat(created_at)
+
+        if referrer:
+            referrer_type = classify_referrer(referrer)
+            if referrer_type.startswith("/"):
+                internal_referrers.append(
+                    dict(
                         created_on=created_on,
                         url=referrer,
                         path=referrer_type,
                         **account_details,
                     )
-                else:
-                    SubscriptionReferrer.create(
+                )
+            else:
+                referrers.append(
+                    dict(
                         created_on=created_on,
                         url=referrer,
                         type=referrer_type,
                         **account_details,
                     )
+                )
 
-            marketing_survey_answer = (
-                csv_row["Jak ses dozvěděl(a) o junior.guru?"] or None
+        if marketing_survey_answer:
+            marketing_survey_answer_type = classify_marketing_survey_answer(
+                marketing_survey_answer
             )
-            if marketing_survey_answer:
-                marketing_survey_answer_type = classify_marketing_survey_answer(
-                    marketing_survey_answer
-                )
-                SubscriptionMarketingSurvey.create(
-                    account_id=account_id,
-                    account_name=csv_row["Full Name"],
-                    account_email=csv_row["Email"],
-                    account_total_spend=total_spend[account_id],
-                    created_on=date.fromisoformat(csv_row["Created at"]),
+            marketing_surveys.append(
+                dict(
+                    created_on=created_on,
                     value=marketing_survey_answer,
                     type=marketing_survey_answer_type,
+                    **account_details,
                 )
+            )
 
-        logger.info("Fetching cancellations data from Memberful CSV")
-        csv_rows = itertools.chain(
-            memberful.download_csv(
-                path="/admin/csv_exports",
-                url_params={
-                    "filter": "all",
-                    "type": "CancellationsCsvExport",
-                },
-            ),
-            memberful.download_csv(
-                path="/admin/csv_exports",
-                url_params={
-                    "filter": "all",
-                    "type": "CancellationsCsvExport",
-                    "scope": "completed",
-                },
-            ),
-        )
+    with db.atomic():
+        for model, rows in [
+            (SubscriptionReferrer, referrers),
+            (SubscriptionInternalReferrer, internal_referrers),
+            (SubscriptionMarketingSurvey, marketing_surveys),
+        ]:
+            for batch in chunked(rows, INSERT_BATCH_SIZE):
+                model.insert_many(batch).execute()
+
+
+def store_cancellations_csv(
+    csv_rows: Iterable[dict], emails: dict[str, int], total_spend: dict[int, int]
+) -> None:
+    with db.atomic():
         for csv_row in csv_rows:
-            account_email = csv_row["Email"]
-            if "členství v klubu" not in csv_row["Plan"].lower():
+            account_email, account_name, plan, reason, feedback = (
+                get_cancellations_csv_columns(csv_row)
+            )
+            if "členství v klubu" not in plan.lower():
                 logger.debug(
-                    f"Skipping cancellation of {account_email}, not a club subscription: {csv_row['Plan']!r}"
+                    f"Skipping cancellation of {account_email}, not a club subscription: {plan!r}"
                 )
+                continue
+
+            logger.debug(f"Processing cancellation of {account_email}")
+            if reason:
+                reason = slugify(reason, separator="_")
             else:
-                logger.debug(f"Processing cancellation of {account_email}")
-                if csv_row["Reason"]:
-                    reason = slugify(csv_row["Reason"], separator="_")
-                else:
-                    reason = SubscriptionCancellationReason.UNKNOWN
-                feedback = csv_row["Feedback"] or None
-                try:
-                    date_field_value = csv_row.get("Date") or csv_row.get(
-                        "Expiration Date"
-                    )
-                    expires_on = date.fromisoformat(date_field_value)
-                except ValueError:
-                    logger.warning(f"Invalid date format: {date_field_value!r}")
-                    expires_on = None
-                account_id = emails[account_email]
-                logger.debug(
-                    f"Adding cancellation of {memberful_url(account_id)} ({account_email})"
-                )
-                SubscriptionCancellation.add(
-                    account_id=account_id,
-                    account_name=csv_row["Name"],
-                    account_email=account_email,
-                    account_total_spend=total_spend[account_id],
-                    expires_on=expires_on,
-                    reason=reason,
-                    feedback=feedback,
-                )
-    except Exception as e:
-        logger.exception("Failed to fetch data from Memberful")
-        discord_task.run(report_exception, error_channel_id, e)
+                reason = SubscriptionCancellationReason.UNKNOWN
+            try:
+                date_field_value = csv_row.get("Date") or csv_row.get("Expiration Date")
+                expires_on = date.fromisoformat(date_field_value)
+            except ValueError:
+                logger.warning(f"Invalid date format: {date_field_value!r}")
+                expires_on = None
+            account_id = emails[account_email]
+            logger.debug(
+                f"Adding cancellation of {memberful_url(account_id)} ({account_email})"
+            )
+            SubscriptionCancellation.add(
+                account_id=account_id,
+                account_name=account_name,
+                account_email=account_email,
+                account_total_spend=total_spend[account_id],
+                expires_on=expires_on,
+                reason=reason,
+                feedback=feedback or None,
+            )
 
 
 @db.connection_context()
@@ -28,10 +28,7 @@ async def test_language_parser_process(description_text: str, expected_lang: str
 @pytest.mark.asyncio
 async def test_language_parser_process_does_not_error_when_ran_in_parallel():
     results = await asyncio.gather(
-        *[
-            process(dict(description_text=extract_text(path.read_text())))
-            for path in (Path(__file__).parent).rglob("*.html")
-        ]
+        *[process(dict(description_text=fixture.values[0])) for fixture in fixtures]
     )
 
     assert len(results) > 5, "Not enough fixtures to test parallelism"
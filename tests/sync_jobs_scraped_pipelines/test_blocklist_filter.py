@@ -40,3 +40,9 @@ async def test_blocklist_filter_blocks_senior():
 async def test_blocklist_filter_drops_machine_programmers(title):
     with pytest.raises(DropItem):
         await process(dict(title=title))
+
+
+@pytest.mark.asyncio
+async def test_blocklist_filter_reports_first_rule_in_list():
+    with pytest.raises(DropItem, match=r"mana\(ž\|g\)er"):
+        await process(dict(title="Marketing Manager"))
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from diskcache import Cache
+from diskcache.core import ENOVAL
+
+from jg.coop.lib import cache as cache_module
+from jg.coop.lib.cache import CACHE_DIR, MemoryCache, cache
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    disk_cache = Cache(tmp_path)
+    monkeypatch.setitem(cache_module._cache_instances, CACHE_DIR, disk_cache)
+    yield disk_cache
+    disk_cache.close()
+
+
+def test_memory_cache_hit():
+    memory_cache = MemoryCache(2)
+    memory_cache.set(("a",), 1, None)
+
+    assert memory_cache.get(("a",)) == 1
+
+
+def test_memory_cache_miss():
+    memory_cache = MemoryCache(2)
+
+    assert memory_cache.get(("a",)) is ENOVAL
+
+
+def test_memory_cache_not_expired():
+    memory_cache = MemoryCache(2)
+    memory_cache.set(("a",), 1, time.time() + 60)
+
+    assert memory_cache.get(("a",)) == 1
+
+
+def test_memory_cache_expired():
+    memory_cache = MemoryCache(2)
+    memory_cache.set(("a",), 1, time.time() - 1)
+
+    assert memory_cache.get(("a",)) is ENOVAL
+
+
+def test_memory_cache_evicts_least_recently_used():
+    memory_cache = MemoryCache(2)
+    memory_cache.set(("a",), 1, None)
+    memory_cache.set(("b",), 2, None)
+    memory_cache.get(("a",))
+    memory_cache.set(("c",), 3, None)
+
+    assert memory_cache.get(("a",)) == 1
+    assert memory_cache.get(("b",)) is ENOVAL
+    assert memory_cache.get(("c",)) == 3
+
+
+def test_memory_cache_returns_copies():
+    memory_cache = MemoryCache(2)
+    value = {"lang": "cs"}
+    memory_cache.set(("a",), value, None)
+    value["lang"] = "en"
+    memory_cache.get(("a",))["lang"] = "de"
+
+    assert memory_cache.get(("a",)) == {"lang": "cs"}
+
+
+def test_memory_cache_unhashable_key():
+    memory_cache = MemoryCache(2)
+    memory_cache.set((["a"],), 1, None)
+
+    assert memory_cache.get((["a"],)) is ENOVAL
+
+
+@pytest.mark.asyncio
+async def test_cache_async_unhashable_arguments(disk_cache):
+    calls = []
+
+    @cache(expire=60)
+    async def count(items):
+        calls.append(items)
+        return len(items)
+
+    assert await count(["a", "b"]) == 2
+    assert await count(["a", "b"]) == 2
+    assert calls == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_cache_async_hit(disk_cache):
+    calls = []
+
+    @cache(expire=60)
+    async def count(text):
+        calls.append(text)
+        return {"length": len(text)}
+
+    assert await count("abc") == {"length": 3}
+    assert await count("abc") == {"length": 3}
+    assert calls == ["abc"]
@@ -32,3 +32,10 @@ def test_parse_coupon(coupon, expected):
 def test_parse_coupon_raises_on_wrong_input():
     with pytest.raises(TypeError):
         coupons.parse_coupon(None)
+
+
+def test_parse_coupon_returns_copy():
+    parts = coupons.parse_coupon("GARGAMEL1234567")
+    parts["slug"] = "smurf"
+
+    assert coupons.parse_coupon("GARGAMEL1234567")["slug"] == "gargamel"
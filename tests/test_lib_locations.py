@@ -104,6 +104,13 @@ GEOCODED_ADDRESS = {
             "Michálkovická 1137/197, 710 00 Ostrava - Slezská Ostrava, Czechia",
             {"place": "Ostrava", "region": "Ostrava", "country": "Česko"},
         ),
+        ("Brno, Praha", {"place": "Praha", "region": "Praha", "country": "Česko"}),
+        (
+            "Ostrava nebo Praha",
+            {"place": "Praha", "region": "Praha", "country": "Česko"},
+        ),
+        ("Česko", None),
+        ("Česko, Brno", {"place": "Brno", "region": "Brno", "country": "Česko"}),
     ],
 )
 def test_optimize_geocoding(location_raw, expected):
@@ -81,3 +81,28 @@ def test_infer_level(global_value, env, expected):
 )
 def test_infer_timestamp(global_value, env, expected):
     assert loggers._infer_timestamp(global_value, env) is expected
+
+
+@pytest.mark.parametrize(
+    "items_count, expected",
+    [
+        (0, []),
+        (2, ["Done 2 items"]),
+        (4, ["Done 2 items", "Done 4 items"]),
+        (5, ["Done 2 items", "Done 4 items", "Done 5 items"]),
+    ],
+)
+def test_progress(caplog, items_count, expected):
+    logger = loggers.get("name")
+    items = list(logger.progress(range(items_count), chunk_size=2))
+
+    assert items == list(range(items_count))
+    assert [record.message for record in caplog.records] == expected
+
+
+def test_progress_is_lazy():
+    def generate():
+        yield 1
+        raise RuntimeError("consumed too early")
+
+    assert next(loggers.get("name").progress(generate(), chunk_size=100)) == 1
@@ -696,6 +696,66 @@ def test_user_recent_upvotes_count_skips_some_channels(test_db):
     assert user.recent_upvotes_count(today=date(2021, 4, 1)) == 4
 
 
+def test_user_content_sizes(test_db):
+    user1 = create_user(1)
+    user2 = create_user(2)
+    create_user(3)
+
+    create_message(1, user1, content="0123456789")
+    create_message(2, user1, content="01234")
+    create_message(3, user2, content="012")
+    create_message(4, user2, content="0123456789", is_private=True)
+
+    assert ClubUser.content_sizes() == {1: 15, 2: 3}
+
+
+def test_user_recent_content_sizes(test_db):
+    user1 = create_user(1)
+    user2 = create_user(2)
+
+    create_message(1, user1, created_at=datetime(2021, 2, 15), content="0123456789")
+    create_message(2, user1, created_at=datetime(2021, 3, 10), content="0123456789")
+    create_message(3, user2, created_at=datetime(2021, 3, 15), content="012")
+    create_message(
+        4,
+        user2,
+        created_at=datetime(2021, 3, 15),
+        content="0123456789",
+        is_private=True,
+    )
+
+    assert ClubUser.recent_content_sizes(today=date(2021, 4, 1)) == {1: 10, 2: 3}
+
+
+def test_user_upvotes_counts(test_db):
+    user1 = create_user(1)
+    user2 = create_user(2)
+
+    create_message(1, user1, upvotes_count=1, channel_id=ClubChannelID.INTRO)
+    create_message(2, user1, upvotes_count=4)
+    create_message(3, user2, upvotes_count=10)
+    create_message(4, user2, upvotes_count=300, is_private=True)
+
+    assert ClubUser.upvotes_counts() == {1: 4, 2: 10}
+
+
+def test_user_recent_upvotes_counts_private(test_db):
+    user1 = create_user(1)
+    user2 = create_user(2)
+
+    create_message(1, user1, upvotes_count=1, created_at=datetime(2021, 2, 15))
+    create_message(2, user1, upvotes_count=4, created_at=datetime(2021, 3, 10))
+    create_message(3, user2, upvotes_count=10, created_at=datetime(2021, 3, 15))
+    create_message(
+        4, user2, upvotes_count=300, created_at=datetime(2021, 3, 15), is_private=True
+    )
+
+    assert ClubUser.recent_upvotes_counts(today=date(2021, 4, 1), private=True) == {
+        1: 4,
+        2: 310,
+    }
+
+
 def test_last_bot_message_filters_by_channel_id(test_db, juniorguru_bot):
     message1 = create_message(1, juniorguru_bot, content="🔥 abc", channel_id=123)
     create_message(2, juniorguru_bot, content="🔥 abc", channel_id=456)
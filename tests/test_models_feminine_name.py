@@ -0,0 +1,37 @@
+import pytest
+
+from jg.coop.models.feminine_name import FeminineName
+
+from testing_utils import prepare_test_db
+
+
+@pytest.fixture
+def test_db():
+    yield from prepare_test_db([FeminineName])
+
+
+@pytest.fixture
+def names(test_db):
+    FeminineName.create(name="jana")
+    FeminineName.create(name="anna")
+
+
+@pytest.mark.parametrize("preload", [False, True])
+@pytest.mark.parametrize(
+    "full_name, expected",
+    [
+        ("Jana Nováková", True),
+        ("Jana Novak", True),
+        ("Petr Novák", False),
+        ("Anna-Marie Smith", True),
+        ("Honza Dvořák", False),
+    ],
+)
+def test_is_feminine(names, full_name, expected, preload):
+    preloaded_names = FeminineName.names() if preload else None
+
+    assert FeminineName.is_feminine(full_name, preloaded_names) is expected
+
+
+def test_names(names):
+    assert FeminineName.names() == frozenset({"jana", "anna"})
@@ -1,7 +1,13 @@
 from collections import namedtuple
+from datetime import datetime
 from operator import attrgetter
 
+import pytest
+
+from jg.coop.lib.mutations import allowing
+from jg.coop.models.club import ClubUser
 from jg.coop.sync.roles import (
+    apply_changes,
     calc_stats,
     evaluate_changes,
     repr_ids,
@@ -9,12 +15,45 @@ from jg.coop.sync.roles import (
     repr_stats,
 )
 
+from testing_utils import prepare_test_db
+
 
 DummyRole = namedtuple("Role", ["name"])
 DummyMember = namedtuple(
     "Member", ["id", "display_name", "upvotes_count"], defaults=[0]
 )
 
+StubRole = namedtuple("Role", ["id", "name"])
+
+
+class StubDiscordMember:
+    def __init__(self, id, roles=None):
+        self.id = id
+        self.display_name = f"Member {id}"
+        self.roles = list(roles or [])
+
+    async def add_roles(self, *roles):
+        self.roles.extend(roles)
+
+    async def remove_roles(self, *roles):
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+@pytest.fixture
+def test_db():
+    yield from prepare_test_db([ClubUser])
+
+
+def create_user(id):
+    return ClubUser.create(
+        id=id,
+        is_member=True,
+        is_bot=False,
+        display_name=f"Member {id}",
+        mention=f"<@{id}>",
+        joined_at=datetime(2024, 1, 1),
+    )
+
 
 def test_repr_roles():
     roles = [DummyRole("admin"), DummyRole("member"), DummyRole("hero")]
@@ -23,34 +62,28 @@ def test_repr_roles():
 
 
 def test_repr_ids():
-    members = [
-        DummyMember(1, "Zuzka"),
-        DummyMember(2, "Honza"),
-        DummyMember(3, "Ondřej"),
-    ]
+    display_names = {1: "Zuzka", 2: "Honza", 3: "Ondřej"}
+
+    assert repr_ids(display_names, [1, 2]) == "['Honza', 'Zuzka']"
+
+
+def test_repr_ids_missing_member():
+    display_names = {1: "Zuzka", 2: "Honza", 3: "Ondřej"}
 
-    assert repr_ids(members, [1, 2]) == "['Honza', 'Zuzka']"
+    assert repr_ids(display_names, [1, 4]) == repr(["(doesn't exist)", "Zuzka"])
 
 
 def test_repr_ids_case_doesnt_matter():
-    members = [
-        DummyMember(1, "Zuzka"),
-        DummyMember(2, "honza"),
-        DummyMember(3, "ondřej"),
-    ]
+    display_names = {1: "Zuzka", 2: "honza", 3: "ondřej"}
 
-    assert repr_ids(members, [1, 2]) == "['honza', 'Zuzka']"
+    assert repr_ids(display_names, [1, 2]) == "['honza', 'Zuzka']"
 
 
 def test_repr_stats():
-    members = [
-        DummyMember(1, "Zuzka"),
-        DummyMember(2, "Honza"),
-        DummyMember(3, "Ondřej"),
-    ]
+    display_names = {1: "Zuzka", 2: "Honza", 3: "Ondřej"}
     stats = {1: 42, 2: 420}
 
-    assert repr_stats(members, stats) == "{'Zuzka': 42, 'Honza': 420}"
+    assert repr_stats(display_names, stats) == "{'Zuzka': 42, 'Honza': 420}"
 
 
 def test_calc_stats():
@@ -73,6 +106,16 @@ def test_calc_stats_higher_top_limit():
     assert calc_stats(members, attrgetter("upvotes_count"), 2) == {1: 20, 3: 5}
 
 
+def test_calc_stats_ties_keep_order_of_members():
+    members = [
+        DummyMember(1, "Zuzka", 5),
+        DummyMember(2, "Honza", 20),
+        DummyMember(3, "Ondřej", 5),
+    ]
+
+    assert calc_stats(members, attrgetter("upvotes_count"), 2) == {2: 20, 1: 5}
+
+
 def test_evaluate_changes_member_should_have_this_role_and_already_has():
     member_id = 1
     member_roles = [222, 333, 444]
@@ -115,3 +158,62 @@ def test_evaluate_changes_member_shouldnt_have_this_role_but_has():
     assert evaluate_changes(member_id, member_roles, role_members_ids, role_id) == [
         (1, "remove", 222)
     ]
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_no_changes(test_db):
+    assert await apply_changes([], {}, []) is None
+
+
+@pytest.mark.asyncio
+async def test_apply_changes(test_db):
+    role_a, role_b = StubRole(1, "a"), StubRole(2, "b")
+    create_user(100)
+    create_user(200)
+    discord_members = {
+        100: StubDiscordMember(100, roles=[role_b]),
+        200: StubDiscordMember(200),
+    }
+    changes = [(100, "add", 1), (100, "remove", 2), (200, "add", 2)]
+
+    with allowing("discord"):
+        await apply_changes([role_a, role_b], discord_members, changes)
+
+    assert ClubUser.get_by_id(100).updated_roles == [1]
+    assert ClubUser.get_by_id(200).updated_roles == [2]
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_member_not_on_discord(test_db):
+    role = StubRole(1, "a")
+    create_user(100)
+    create_user(200)
+    discord_members = {100: StubDiscordMember(100)}
+    changes = [(100, "add", 1), (200, "add", 1)]
+
+    with allowing("discord"):
+        await apply_changes([role], discord_members, changes)
+
+    assert ClubUser.get_by_id(100).updated_roles == [1]
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_member_fails(test_db):
+    class FailingDiscordMember(StubDiscordMember):
+        async def add_roles(self, *roles):
+            raise RuntimeError("Discord is down")
+
+    role = StubRole(1, "a")
+    create_user(100)
+    create_user(200)
+    discord_members = {
+        100: StubDiscordMember(100),
+        200: FailingDiscordMember(200),
+    }
+    changes = [(100, "add", 1), (200, "add", 1)]
+
+    with allowing("discord"):
+        await apply_changes([role], discord_members, changes)
+
+    assert ClubUser.get_by_id(100).updated_roles == [1]
+    assert ClubUser.get_by_id(200).updated_roles != [1]
@@ -99,6 +99,52 @@ def test_activities_from_subscription():
     ]
 
 
+def test_activities_from_subscription_newest_order_gets_subscription_coupon():
+    subscription = {
+        "coupon": {"code": "THANKYOU1234567890"},
+        "createdAt": 1634013431,
+        "activatedAt": None,
+        "expiresAt": 1701970564,
+        "member": {"fullName": "Keira Heart", "id": "2782496"},
+        "orders": [
+            {"coupon": None, "createdAt": 1634013431},
+            {"coupon": None, "createdAt": 1670360425},
+            {"coupon": None, "createdAt": 1635223064},
+        ],
+        "plan": {"intervalUnit": "year", "planGroup": PLAN_GROUP},
+        "trialEndAt": None,
+        "trialStartAt": None,
+    }
+    activities = list(activities_from_subscription(subscription))[2:]
+
+    assert [
+        (activity["happened_on"], activity["order_coupon_slug"])
+        for activity in activities
+    ] == [
+        (date(2022, 12, 6), "thankyou"),
+        (date(2021, 10, 26), None),
+        (date(2021, 10, 12), None),
+    ]
+
+
+def test_activities_from_subscription_no_orders():
+    subscription = {
+        "coupon": None,
+        "createdAt": 1634013431,
+        "activatedAt": None,
+        "expiresAt": 1701970564,
+        "member": {"fullName": "Keira Heart", "id": "2782496"},
+        "orders": [],
+        "plan": {"intervalUnit": "year", "planGroup": PLAN_GROUP},
+        "trialEndAt": None,
+        "trialStartAt": None,
+    }
+
+    assert [
+        activity["type"] for activity in activities_from_subscription(subscription)
+    ] == [SubscriptionActivityType.ORDER, SubscriptionActivityType.DEACTIVATION]
+
+
 @pytest.mark.parametrize(
     "coupon_data, expected",
     [